@@ -1,32 +1,193 @@
+import hashlib
+import io
+import json
 import os
 import subprocess
-import tempfile
 import shutil
 import sys
+import tarfile
+import tempfile
+import time
+import urllib.parse
+import urllib.request
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from dotenv import load_dotenv
 
+# pygit2 (enlaces a libgit2) es opcional: si está instalado, la validación
+# del remoto se hace en el propio proceso sin el fork+exec de un git externo.
+try:
+    import pygit2
+    _ERRORES_REMOTO = (subprocess.CalledProcessError,
+                       subprocess.TimeoutExpired, pygit2.GitError)
+except ImportError:
+    pygit2 = None
+    _ERRORES_REMOTO = (subprocess.CalledProcessError,
+                       subprocess.TimeoutExpired)
 
-def verificar_url_repositorio(url):
-    """Verifica si el URL del repositorio es válido usando git ls-remote."""
+# Caché en disco de resultados de git ls-remote: evita repetir el viaje de
+# red (~0.7 s) cuando el script se ejecuta varias veces con el mismo URL.
+CACHE_LSREMOTE = Path.home() / ".cache" / "entorno-dev" / "lsremote.json"
+CACHE_LSREMOTE_TTL = 300  # segundos
+
+
+def _clave_cache_lsremote(url):
+    """Genera la clave de caché para un URL, incluyendo el token de
+    autenticación si existe, para no reutilizar resultados obtenidos con
+    otras credenciales."""
+    token = os.environ.get("GIT_TOKEN", "")
+    return hashlib.sha256(f"{url}\n{token}".encode()).hexdigest()
+
+
+def _leer_cache_lsremote():
     try:
-        subprocess.run(["git", "ls-remote", url],
-                       check=True, capture_output=True)
+        return json.loads(CACHE_LSREMOTE.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def _guardar_cache_lsremote(cache):
+    try:
+        CACHE_LSREMOTE.parent.mkdir(parents=True, exist_ok=True)
+        CACHE_LSREMOTE.write_text(json.dumps(cache))
+    except OSError:
+        pass  # la caché es solo una optimización
+
+
+def obtener_head_cacheado(url):
+    """Devuelve la entrada cacheada {sha, ref, ts} del HEAD remoto, o None."""
+    entrada = _leer_cache_lsremote().get(_clave_cache_lsremote(url))
+    if entrada and time.time() - entrada["ts"] < CACHE_LSREMOTE_TTL:
+        return entrada
+    return None
+
+
+def _entorno_git_sin_prompt():
+    """Entorno para subprocesos git que nunca deben pedir credenciales: un
+    URL privado o inválido debe fallar en segundos, no esperar contraseña."""
+    return {**os.environ, "GIT_TERMINAL_PROMPT": "0",
+            "GIT_ASKPASS": "/bin/true"}
+
+
+def _resolver_head_remoto(url):
+    """Resuelve el sha y la rama predeterminada del HEAD remoto.
+
+    Con pygit2 disponible, la consulta se hace en el propio proceso a través
+    de libgit2; si no, se recurre al subproceso git ls-remote."""
+    if pygit2 is not None:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            repo = pygit2.init_repository(temp_dir, bare=True)
+            remoto = repo.remotes.create_anonymous(url)
+            for referencia in remoto.ls_remotes():
+                if referencia["name"] == "HEAD":
+                    return str(referencia["oid"]), referencia["symref_target"]
+            return None, None
+
+    resultado = subprocess.run(["git", "ls-remote", "--symref", url, "HEAD"],
+                               check=True, capture_output=True, text=True,
+                               env=_entorno_git_sin_prompt(), timeout=15)
+    sha, ref = None, None
+    for linea in resultado.stdout.splitlines():
+        if linea.startswith("ref:"):
+            ref = linea.split()[1]
+        elif linea.endswith("HEAD"):
+            sha = linea.split()[0]
+    return sha, ref
+
+
+def verificar_url_repositorio(url):
+    """Verifica si el URL del repositorio es válido consultando su HEAD.
+
+    Guarda el HEAD resuelto (sha y rama predeterminada) en una caché en
+    disco con TTL corto para que ejecuciones repetidas no repitan la red.
+    """
+    if obtener_head_cacheado(url):
         return True
-    except subprocess.CalledProcessError:
+    try:
+        sha, ref = _resolver_head_remoto(url)
+    except _ERRORES_REMOTO:
         print("URL no válido o no se pudo conectar al repositorio.")
         return False
 
+    cache = _leer_cache_lsremote()
+    cache[_clave_cache_lsremote(url)] = {
+        "sha": sha, "ref": ref, "ts": time.time()}
+    _guardar_cache_lsremote(cache)
+    return True
+
 
-def obtener_nombre_y_archivos_repositorio(url):
-    """Clona el repositorio en una carpeta temporal y obtiene su nombre y archivos."""
-    with tempfile.TemporaryDirectory() as temp_dir:
-        subprocess.run(["git", "clone", "--depth",
-                       "1", url, temp_dir], check=True)
-        repo_name = Path(temp_dir).name
-        archivos = [str(archivo.relative_to(temp_dir))
-                    for archivo in Path(temp_dir).rglob('*') if archivo.is_file()]
-        return repo_name, archivos
+def obtener_nombre_y_archivos_repositorio(carpeta):
+    """Obtiene el nombre y la lista de archivos del repositorio ya clonado.
+
+    Recorre el árbol con os.scandir, que responde is_file()/is_dir() desde
+    la caché de readdir sin un stat extra por entrada, y salta .git para no
+    enumerar los miles de objetos del pack.
+    """
+    raiz = str(Path(carpeta).resolve())
+    repo_name = os.path.basename(raiz)
+    archivos = []
+    pendientes = deque([raiz])
+    while pendientes:
+        directorio = pendientes.popleft()
+        with os.scandir(directorio) as entradas:
+            for entrada in entradas:
+                if entrada.is_dir(follow_symlinks=False):
+                    if entrada.name != ".git":
+                        pendientes.append(entrada.path)
+                elif entrada.is_file(follow_symlinks=False):
+                    archivos.append(entrada.path[len(raiz) + 1:])
+    return repo_name, archivos
+
+
+def listar_archivos_remoto(url):
+    """Obtiene la lista de archivos del repositorio sin clonarlo.
+
+    Para github.com y gitlab.com basta una petición al API de árboles (unos
+    kilobytes en lugar de un clon). Para otros hosts se intenta git archive
+    --remote, cuyo tar se recorre en streaming solo para leer los nombres.
+    Devuelve None si ninguna vía está disponible."""
+    partes = urllib.parse.urlparse(url)
+    ruta = partes.path.removesuffix(".git").strip("/")
+    try:
+        if partes.netloc == "github.com":
+            api = f"https://api.github.com/repos/{
+                ruta}/git/trees/HEAD?recursive=1"
+            with urllib.request.urlopen(api, timeout=15) as respuesta:
+                datos = json.load(respuesta)
+            return [nodo["path"] for nodo in datos.get("tree", [])
+                    if nodo.get("type") == "blob"]
+        if partes.netloc == "gitlab.com":
+            proyecto = urllib.parse.quote(ruta, safe="")
+            api = f"https://gitlab.com/api/v4/projects/{
+                proyecto}/repository/tree?recursive=true&per_page=100"
+            with urllib.request.urlopen(api, timeout=15) as respuesta:
+                datos = json.load(respuesta)
+            return [nodo["path"] for nodo in datos
+                    if nodo.get("type") == "blob"]
+
+        # Mismas precauciones que la verificación: sin terminal de
+        # credenciales, sin stdin heredado y con espera acotada. Este camino
+        # lo toman también los URL estilo scp (git@host:usuario/repo.git).
+        proceso = subprocess.Popen(["git", "archive", f"--remote={url}", "HEAD"],
+                                   stdout=subprocess.PIPE,
+                                   stderr=subprocess.DEVNULL,
+                                   stdin=subprocess.DEVNULL,
+                                   env=_entorno_git_sin_prompt())
+        try:
+            with tarfile.open(fileobj=proceso.stdout, mode="r|*") as tar:
+                archivos = [miembro.name for miembro in tar if miembro.isfile()]
+            proceso.stdout.close()
+            if proceso.wait(timeout=15) == 0:
+                return archivos
+        except Exception:
+            # No dejar al hijo huérfano si el tar o la espera fallan
+            proceso.kill()
+            proceso.wait()
+            raise
+    except (OSError, ValueError, tarfile.TarError, subprocess.SubprocessError):
+        pass
+    return None
 
 
 def seleccionar_carpeta_clonacion(default_dir):
@@ -58,68 +219,108 @@ def clone_repository(repo_url, destination_folder):
     if not os.path.exists(destination_folder):
         os.makedirs(destination_folder)
 
-    # Ejecutar el comando de clonación de git
-    try:
-        result = subprocess.run(
-            ["git", "clone", repo_url, destination_folder],
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        print("Repositorio clonado con éxito en:", destination_folder)
-    except subprocess.CalledProcessError as e:
-        print("Error al clonar el repositorio:", e.stderr)
+    comando = ["git", "-c", "protocol.version=2", "clone", "--depth=1",
+               "--single-branch", "--filter=blob:none", "--no-tags",
+               "--progress"]
+    # Clonar la rama resuelta durante la verificación, para que el clon
+    # coincida con lo que se validó aunque el HEAD remoto cambie entre medias.
+    entrada = obtener_head_cacheado(repo_url)
+    if entrada and entrada.get("ref"):
+        comando += ["--branch", entrada["ref"].removeprefix("refs/heads/")]
+    comando += [repo_url, destination_folder]
+
+    # Ejecutar el comando de clonación de git, transmitiendo su progreso
+    # línea a línea en lugar de acumular toda la salida en memoria: el
+    # usuario ve el avance y el consumo de memoria se mantiene plano.
+    proceso = subprocess.Popen(
+        comando, stderr=subprocess.PIPE, text=True, bufsize=1)
+    for linea in proceso.stderr:
+        print(linea, end="")
+    if proceso.wait() != 0:
+        print("Error al clonar el repositorio.")
         return False
-
-    # Listar archivos principales como vista previa
-    show_file_preview(destination_folder)
+    print("Repositorio clonado con éxito en:", destination_folder)
     return True
 
 
-def show_file_preview(folder_path):
-    print("\nVista previa de archivos en el proyecto:")
-    for root, dirs, files in os.walk(folder_path):
-        # Mostrar solo los archivos principales (en la raíz y carpetas clave)
-        if root == folder_path or os.path.basename(root) in ["src", "lib"]:
-            for file in files:
-                print("- ", os.path.relpath(os.path.join(root, file), folder_path))
-    print("\nFinal de la vista previa de archivos.")
+MAX_VISTA_PREVIA = 50
 
 
-def detect_dependencies(project_folder):
-    print("\n--- Detectando dependencias ---")
+def show_file_preview(folder_path):
+    """Muestra los archivos principales (raíz y carpetas src/lib), con un
+    tope de entradas. Solo se listan esas carpetas, así que árboles enormes
+    como .git/objects o node_modules nunca llegan a enumerarse.
+
+    Devuelve el conjunto de nombres de la raíz para que la detección de
+    dependencias pueda reutilizar este mismo escaneo."""
+    lineas = ["", "Vista previa de archivos en el proyecto:"]
+    mostrados = 0
+    carpetas_clave = []
+    entradas_raiz = set()
+    with os.scandir(folder_path) as entradas:
+        for entrada in entradas:
+            entradas_raiz.add(entrada.name)
+            if entrada.is_dir(follow_symlinks=False):
+                if entrada.name in ("src", "lib"):
+                    carpetas_clave.append(entrada.path)
+            elif mostrados < MAX_VISTA_PREVIA:
+                lineas.append(f"-  {entrada.name}")
+                mostrados += 1
+    for carpeta in carpetas_clave:
+        with os.scandir(carpeta) as entradas:
+            for entrada in entradas:
+                if mostrados >= MAX_VISTA_PREVIA:
+                    break
+                if entrada.is_file(follow_symlinks=False):
+                    lineas.append(
+                        f"-  {os.path.relpath(entrada.path, folder_path)}")
+                    mostrados += 1
+    lineas += ["", "Final de la vista previa de archivos."]
+    # Una sola escritura por fase: evita un bloqueo+flush de stdio por línea
+    sys.stdout.write("\n".join(lineas) + "\n")
+    return entradas_raiz
+
+
+def detect_dependencies(project_folder, root_entries=None):
+    """Detecta las dependencias del proyecto a partir del listado de la raíz.
+
+    Si la vista previa ya escaneó la carpeta, su conjunto de nombres se
+    reutiliza vía root_entries y no se toca el disco otra vez."""
+    lineas = ["", "--- Detectando dependencias ---"]
     dependencies = {}
 
+    if root_entries is None:
+        with os.scandir(project_folder) as entradas:
+            root_entries = {entrada.name for entrada in entradas}
+
     # Detectar Node.js (buscando package.json)
-    package_json_path = os.path.join(project_folder, 'package.json')
-    if os.path.exists(package_json_path):
+    if 'package.json' in root_entries:
         dependencies['Node.js'] = 'package.json'
-        print("Archivo de configuración Node.js detectado (package.json).")
+        lineas.append("Archivo de configuración Node.js detectado (package.json).")
 
     # Detectar Python (buscando requirements.txt o Pipfile)
-    requirements_txt_path = os.path.join(project_folder, 'requirements.txt')
-    pipfile_path = os.path.join(project_folder, 'Pipfile')
-    if os.path.exists(requirements_txt_path):
+    if 'requirements.txt' in root_entries:
         dependencies['Python'] = 'requirements.txt'
-        print("Archivo de configuración de Python detectado (requirements.txt).")
-    elif os.path.exists(pipfile_path):
+        lineas.append(
+            "Archivo de configuración de Python detectado (requirements.txt).")
+    elif 'Pipfile' in root_entries:
         dependencies['Python'] = 'Pipfile'
-        print("Archivo de configuración de Python detectado (Pipfile).")
+        lineas.append("Archivo de configuración de Python detectado (Pipfile).")
 
     # Detectar entorno virtual (venv)
-    venv_path = os.path.join(project_folder, 'venv')
-    if os.path.exists(venv_path):
+    if 'venv' in root_entries:
         dependencies['Python virtual environment'] = 'venv'
-        print("Entorno virtual detectado (venv).")
+        lineas.append("Entorno virtual detectado (venv).")
 
     # Mostrar resumen de las dependencias
     if dependencies:
-        print("\n--- Resumen de dependencias detectadas ---")
+        lineas += ["", "--- Resumen de dependencias detectadas ---"]
         for dep, config_file in dependencies.items():
-            print(f"{dep} (configurado en: {config_file})")
+            lineas.append(f"{dep} (configurado en: {config_file})")
     else:
-        print("No se detectaron dependencias específicas en el proyecto.")
+        lineas.append("No se detectaron dependencias específicas en el proyecto.")
 
+    sys.stdout.write("\n".join(lineas) + "\n")
     return dependencies
 
 
@@ -145,14 +346,19 @@ def install_dependency(dependency_name, install_command, manual_instructions):
 def install_required_dependencies(dependencies):
     """Verifica e instala automáticamente las dependencias detectadas en el sistema."""
 
+    # Resolver todas las herramientas en una sola pasada: cada shutil.which
+    # recorre $PATH entero, así que se memoiza el resultado en un dict.
+    disponibles = {herramienta: shutil.which(herramienta) is not None
+                   for herramienta in ("git", "node", "npm", "python3", "pip")}
+
     # Verificar si git está instalado
-    if not shutil.which("git"):
+    if not disponibles["git"]:
         print("Error: Git no está instalado. Por favor, instala Git y vuelve a intentarlo.")
         return
 
     # Verificar Node.js y npm
     if 'Node.js' in dependencies:
-        if not shutil.which("node") or not shutil.which("npm"):
+        if not disponibles["node"] or not disponibles["npm"]:
             install_dependency(
                 "Node.js y npm",
                 ["npm", "install", "-g", "node"],
@@ -163,13 +369,13 @@ def install_required_dependencies(dependencies):
 
     # Verificar Python
     if 'Python' in dependencies:
-        if not shutil.which("python3"):
+        if not disponibles["python3"]:
             install_dependency(
                 "Python",
                 ["apt-get", "install", "python3"],
                 "Instala Python desde https://www.python.org/ para obtener la versión adecuada."
             )
-        if not shutil.which("pip"):
+        if not disponibles["pip"]:
             install_dependency(
                 "pip",
                 ["python3", "-m", "ensurepip", "--upgrade"],
@@ -178,17 +384,19 @@ def install_required_dependencies(dependencies):
 
     # Instalar dependencias específicas de Node.js o Python en el proyecto
     project_requirements = {
-        "Node.js": ("npm install", "Ejecuta 'npm install' en el directorio del proyecto."),
-        "Python": ("pip install -r requirements.txt", "Ejecuta 'pip install -r requirements.txt' en el entorno virtual.")
+        "Node.js": (["npm", "install"],
+                    "Ejecuta 'npm install' en el directorio del proyecto."),
+        "Python": (["pip", "install", "-r", "requirements.txt"],
+                   "Ejecuta 'pip install -r requirements.txt' en el entorno virtual.")
     }
 
     for dep, (command, manual_instruction) in project_requirements.items():
         if dep in dependencies:
             print(f"\nPara completar la instalación de {dep}:")
             choice = input(f"¿Quieres ejecutar '{
-                           command}' automáticamente? (s/n): ").lower()
+                           ' '.join(command)}' automáticamente? (s/n): ").lower()
             if choice == 's':
-                subprocess.run(command, shell=True, check=False)
+                subprocess.run(command, check=False)
                 print(f"{dep} se configuró correctamente.")
             else:
                 print(f"Instrucción: {manual_instruction}")
@@ -223,21 +431,48 @@ def setup_environment_variables():
 
 
 def install_python_dependencies():
-    """Instala las dependencias de Python si requirements.txt está presente."""
-    if os.path.exists("requirements.txt"):
-        print("Se detectó requirements.txt. Instalando dependencias de Python...")
-        subprocess.run(["venv/bin/pip", "install", "-r",
-                       "requirements.txt"], check=True)
-        print("Dependencias de Python instaladas correctamente.")
-    else:
+    """Instala las dependencias de Python si requirements.txt está presente.
+
+    Guarda el hash de requirements.txt en venv/.reqs-hash: si no cambió
+    desde la última instalación, no hay nada que hacer y se evita que pip
+    vuelva a resolverlo todo."""
+    if not os.path.exists("requirements.txt"):
         print("No se detectó requirements.txt. Saltando instalación de dependencias de Python.")
+        return
+
+    contenido = Path("requirements.txt").read_bytes()
+    huella = hashlib.blake2b(contenido).hexdigest()
+    marca = Path("venv/.reqs-hash")
+    try:
+        if marca.read_text() == huella:
+            print("Dependencias de Python al día (requirements.txt sin cambios).")
+            return
+    except OSError:
+        pass
+
+    print("Se detectó requirements.txt. Instalando dependencias de Python...")
+    comando = ["venv/bin/pip", "install", "-r", "requirements.txt"]
+    # Si el archivo trae hashes es un lockfile completo: saltarse el
+    # resolutor de pip, que es lo que consume los segundos
+    if b"--hash=" in contenido:
+        comando[2:2] = ["--no-deps", "--require-hashes"]
+    subprocess.run(comando, check=True)
+    marca.write_text(huella)
+    print("Dependencias de Python instaladas correctamente.")
 
 
 def install_node_dependencies():
     """Instala las dependencias de Node.js si package.json está presente."""
     if os.path.exists("package.json"):
         print("Se detectó package.json. Instalando dependencias de Node.js...")
-        subprocess.run(["npm", "install"], check=True)
+        if os.path.exists("package-lock.json"):
+            # npm ci respeta el lockfile sin reescribirlo y evita el
+            # tráfico extra de auditoría y avisos de financiación
+            comando = ["npm", "ci", "--prefer-offline",
+                       "--no-audit", "--no-fund"]
+        else:
+            comando = ["npm", "install"]
+        subprocess.run(comando, check=True)
         print("Dependencias de Node.js instaladas correctamente.")
     else:
         print(
@@ -250,39 +485,56 @@ def main():
     # Paso 1: Solicitar el URL del repositorio
     url = input("Ingrese el URL del repositorio de Git: ").strip()
 
-    # Paso 2: Verificar el URL
-    if verificar_url_repositorio(url):
+    # Paso 2 y 3: Verificar el URL en segundo plano mientras el usuario
+    # selecciona la carpeta de clonación. El subproceso de git libera el GIL
+    # mientras espera la red, así que la espera queda oculta tras el diálogo.
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        verificacion = executor.submit(verificar_url_repositorio, url)
+        listado_remoto = executor.submit(listar_archivos_remoto, url)
+        carpeta_clonacion = seleccionar_carpeta_clonacion(os.getcwd())
+        url_valido = verificacion.result()
+        archivos_remotos = listado_remoto.result()
+
+    if url_valido:
         print("\nURL verificado correctamente.")
 
-        # Paso 3: Obtener el nombre y lista de archivos del repositorio
-        nombre, archivos = obtener_nombre_y_archivos_repositorio(url)
-        if nombre and archivos:
-            print(f"\nNombre del repositorio: {nombre}")
+        # Vista previa sin clonar, obtenida del API del host o de git archive
+        if archivos_remotos:
             print("Archivos del repositorio (vista previa de 10 archivos):")
-            for archivo in archivos[:10]:
+            for archivo in archivos_remotos[:10]:
                 print(f"  - {archivo}")
-        else:
-            print(
-                "No se pudieron obtener los detalles del repositorio. Proceso terminado.")
-            return
 
-        # Paso 4: Seleccionar carpeta de clonación
-        carpeta_clonacion = seleccionar_carpeta_clonacion(os.getcwd())
         if carpeta_clonacion:
             print(f"\nEl repositorio se clonará en: {carpeta_clonacion}")
         else:
             print("Error al seleccionar la carpeta de clonación. Proceso terminado.")
             return
 
-        # Paso 5: Confirmación final
+        # Paso 4: Confirmación final
         input("\nConfiguración inicial completada. Presione Enter para continuar con la clonación...")
 
-        # Paso 6: Clonar el repositorio en la carpeta seleccionada
+        # Paso 5: Clonar el repositorio en la carpeta seleccionada
         if clone_repository(url, carpeta_clonacion):
             print("Repositorio clonado exitosamente.")
 
-            # Paso 7: Detectar dependencias
-            dependencies = detect_dependencies(carpeta_clonacion)
+            # Paso 6: Nombre y lista de archivos del repositorio clonado. Si
+            # la vista previa remota ya mostró los archivos, no hace falta
+            # recorrer el árbol entero para repetir el mismo listado.
+            if archivos_remotos:
+                print(f"\nNombre del repositorio: {
+                      Path(carpeta_clonacion).resolve().name}")
+            else:
+                nombre, archivos = obtener_nombre_y_archivos_repositorio(
+                    carpeta_clonacion)
+                print(f"\nNombre del repositorio: {nombre}")
+                print("Archivos del repositorio (vista previa de 10 archivos):")
+                for archivo in archivos[:10]:
+                    print(f"  - {archivo}")
+
+            # Paso 7: Vista previa y detección de dependencias, compartiendo
+            # un único escaneo de la raíz del proyecto
+            entradas_raiz = show_file_preview(carpeta_clonacion)
+            dependencies = detect_dependencies(carpeta_clonacion, entradas_raiz)
 
             # Paso 8: Instalar dependencias
             install_required_dependencies(dependencies)
@@ -293,15 +545,22 @@ def main():
             # Paso 10: Cargar las variables de entorno desde un archivo .env si está presente
             setup_environment_variables()
 
-            # Paso 11: Instalar las dependencias de Python si requirements.txt está presente
-            install_python_dependencies()
-
-            # Paso 12: Instalar las dependencias de Node.js si package.json está presente
-            install_node_dependencies()
+            # Pasos 11 y 12: Instalar las dependencias de Python y Node.js en
+            # paralelo; ambos instaladores esperan red y disco, no la CPU
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                instalaciones = [executor.submit(install_python_dependencies),
+                                 executor.submit(install_node_dependencies)]
+                for instalacion in instalaciones:
+                    instalacion.result()
 
     else:
         print("Proceso terminado. Verifique el URL e intente de nuevo.")
 
 
 if __name__ == "__main__":
+    # Con la salida redirigida (logs de CI), desactivar el flush por línea:
+    # input() ya vacía stdout antes de leer, así que los diálogos no se pierden
+    if not sys.stdout.isatty():
+        sys.stdout = io.TextIOWrapper(
+            sys.stdout.buffer, line_buffering=False, write_through=False)
     main()